@@ -2,11 +2,6 @@ import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.components.recorder import get_instance
-from homeassistant.components.recorder.statistics import (
-    clear_statistics,
-    list_statistic_ids,
-)
 
 from .const import DOMAIN, CONF_POD
 
@@ -15,47 +10,20 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Migrate old config entry to new format."""
-    _LOGGER.warning(f"[EnelGrid Migration] Starting migration from version {entry.version}")
-
-    if entry.version == 1:
-        # Version 1 -> 2: Clear all statistics and trigger full historical fetch
-        # This fixes corrupted data from previous buggy migrations
-        await _migrate_v1_to_v2(hass, entry)
-        hass.config_entries.async_update_entry(entry, version=2)
-        _LOGGER.warning("[EnelGrid Migration] Migration to version 2 complete")
-
-    if entry.version == 2:
-        # Version 2 -> 3: Clear corrupted statistics and trigger full historical fetch
-        # This fixes data corruption from v1.4.0/v1.4.1 buggy migrations
-        await _migrate_v2_to_v3(hass, entry)
-        hass.config_entries.async_update_entry(entry, version=3)
-        _LOGGER.warning("[EnelGrid Migration] Migration to version 3 complete")
-
-    if entry.version == 3:
-        # Version 3 -> 4: Fix race condition bug (clear and re-fetch)
-        # Version 3 had incomplete migration that didn't actually clear statistics
-        await _migrate_v3_to_v4(hass, entry)
+    _LOGGER.warning("[EnelGrid Migration] Starting migration from version %s", entry.version)
+
+    if entry.version < 4:
+        # Versions 1, 2 and 3 all need the same fix, so run it once and jump to 4:
+        # - v1: corrupted data from previous buggy migrations
+        # - v2: data corruption from v1.4.0/v1.4.1 buggy migrations
+        # - v3: incomplete migration that didn't actually clear statistics
+        await _clear_statistics_and_mark_fetch(hass, entry, f"v{entry.version}→v4")
         hass.config_entries.async_update_entry(entry, version=4)
         _LOGGER.warning("[EnelGrid Migration] Migration to version 4 complete")
 
     return True
 
 
-async def _migrate_v1_to_v2(hass: HomeAssistant, entry: ConfigEntry):
-    """Clear all statistics and mark for full historical re-fetch."""
-    await _clear_statistics_and_mark_fetch(hass, entry, "v1→v2")
-
-
-async def _migrate_v2_to_v3(hass: HomeAssistant, entry: ConfigEntry):
-    """Clear corrupted statistics from v1.4.0/v1.4.1 and trigger fresh fetch."""
-    await _clear_statistics_and_mark_fetch(hass, entry, "v2→v3")
-
-
-async def _migrate_v3_to_v4(hass: HomeAssistant, entry: ConfigEntry):
-    """Fix race condition bug - clear incomplete statistics and re-fetch."""
-    await _clear_statistics_and_mark_fetch(hass, entry, "v3→v4")
-
-
 async def _clear_statistics_and_mark_fetch(hass: HomeAssistant, entry: ConfigEntry, migration_name: str):
     """Mark for clearing statistics and full historical re-fetch.
 
@@ -72,10 +40,10 @@ async def _clear_statistics_and_mark_fetch(hass: HomeAssistant, entry: ConfigEnt
                 break
 
     if not pod:
-        _LOGGER.error(f"[EnelGrid Migration {migration_name}] Cannot find POD in config entry, skipping migration")
+        _LOGGER.error("[EnelGrid Migration %s] Cannot find POD in config entry, skipping migration", migration_name)
         return
 
-    _LOGGER.warning(f"[EnelGrid Migration {migration_name}] Will clear and re-fetch all historical data for POD {pod}")
+    _LOGGER.warning("[EnelGrid Migration %s] Will clear and re-fetch all historical data for POD %s", migration_name, pod)
 
     try:
         # Mark that we need to clear old statistics and do full historical fetch
@@ -86,10 +54,10 @@ async def _clear_statistics_and_mark_fetch(hass: HomeAssistant, entry: ConfigEnt
         new_data["clear_statistics_needed"] = True  # Flag for historical_fetch_task
         hass.config_entries.async_update_entry(entry, data=new_data)
 
-        _LOGGER.warning(f"[EnelGrid Migration {migration_name}] Marked for statistics clear and full historical fetch")
+        _LOGGER.warning("[EnelGrid Migration %s] Marked for statistics clear and full historical fetch", migration_name)
 
     except Exception as e:
-        _LOGGER.error(f"[EnelGrid Migration {migration_name}] Failed during migration: {e}", exc_info=True)
+        _LOGGER.error("[EnelGrid Migration %s] Failed during migration: %s", migration_name, e, exc_info=True)
         raise
 
 
@@ -7,12 +7,16 @@ from homeassistant.core import callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
 
 from .const import (
+    CONF_ENABLE_DEBUG_DUMP,
+    CONF_MAX_LOOKBACK_MONTHS,
     CONF_PASSWORD,
     CONF_POD,
     CONF_PRICE_PER_KWH,
     CONF_USER_NUMBER,
     CONF_USERNAME,
+    DEFAULT_MAX_LOOKBACK_MONTHS,
     DOMAIN,
+    MAX_LOOKBACK_MONTHS,
 )
 from .login import EnelGridSession
 
@@ -48,7 +52,7 @@ class EnelGridConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             except ConfigEntryAuthFailed:
                 errors["base"] = "invalid_auth"
             except Exception as err:
-                _LOGGER.exception(f"Failed to login: {err}")
+                _LOGGER.exception("Failed to login: %s", err)
                 errors["base"] = "unknown"
             else:
                 pod = user_input[CONF_POD]
@@ -102,19 +106,41 @@ class EnelGridConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         return await self.async_step_user()
 
-
-@callback
-def async_get_options_flow(config_entry):
-    """Return the options flow handler if you want to add optional future settings."""
-    return EnelGridOptionsFlowHandler(config_entry)
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow handler."""
+        return EnelGridOptionsFlowHandler(config_entry)
 
 
 class EnelGridOptionsFlowHandler(config_entries.OptionsFlow):
-    """Handle any future options flow (optional)."""
+    """Handle the enelgrid options."""
 
     def __init__(self, config_entry):
         self.config_entry = config_entry
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
-        return self.async_show_form(step_id="init", data_schema=vol.Schema({}))
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_ENABLE_DEBUG_DUMP,
+                        default=options.get(CONF_ENABLE_DEBUG_DUMP, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_MAX_LOOKBACK_MONTHS,
+                        default=options.get(
+                            CONF_MAX_LOOKBACK_MONTHS, DEFAULT_MAX_LOOKBACK_MONTHS
+                        ),
+                    ): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=MAX_LOOKBACK_MONTHS)
+                    ),
+                }
+            ),
+        )
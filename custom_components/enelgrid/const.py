@@ -5,3 +5,10 @@ CONF_USER_NUMBER = "numero utente"
 CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_PRICE_PER_KWH = "price_per_kwh"
+
+# Options
+CONF_ENABLE_DEBUG_DUMP = "enable_debug_dump"
+CONF_MAX_LOOKBACK_MONTHS = "max_lookback_months"
+
+DEFAULT_MAX_LOOKBACK_MONTHS = 36  # How far back the historical fetch may go
+MAX_LOOKBACK_MONTHS = 120
@@ -1,8 +1,11 @@
+import asyncio
 import logging
+import os
 from datetime import datetime, timedelta
 
 import aiohttp
 import homeassistant.exceptions as ha_exceptions
+import orjson
 from bs4 import BeautifulSoup
 
 _LOGGER = logging.getLogger(__name__)
@@ -13,6 +16,9 @@ SAMLAUTH_URL = "https://www.enel.it/bin/samlauth"
 AGGREGATE_CONSUMPTION_URL = (
     "https://www.enel.it/bin/areaclienti/auth/aggregateConsumption"
 )
+DEBUG_DIR = "/config/enelgrid_debug"
+# Statuses meaning the session cookies are no longer accepted
+AUTH_ERROR_STATUSES = (401, 403)
 
 
 class EnelGridSession:
@@ -24,9 +30,59 @@ class EnelGridSession:
         self.pod = pod
         self.user_number = user_number
         self.session = None
+        # Serializes (re)logins when several fetches share this instance concurrently
+        self._login_lock = asyncio.Lock()
+        self._in_flight = {}  # aiohttp session -> requests currently using it
+        self._retired = []  # Replaced sessions, closed once their requests are done
 
     async def close(self):
-        await self.session.close()
+        for session in self._retired:
+            await session.close()
+        self._retired.clear()
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def ensure_logged_in(self):
+        """Log in unless this instance already holds an open session.
+
+        Returns True when a fresh login was performed.
+        """
+        async with self._login_lock:
+            if self.session is not None and not self.session.closed:
+                return False
+            await self.login()
+            return True
+
+    async def _relogin(self, expired_session):
+        """Replace an expired session, unless a concurrent fetch already did.
+
+        Other fetches may still be reading from the expired session, so it is
+        only closed once its last request is done (see _get_raw).
+        """
+        async with self._login_lock:
+            if self.session is not expired_session and self.session is not None:
+                return
+
+            try:
+                await self.login()
+            except Exception:
+                # Drop the half logged-in session so the next fetch starts over
+                if self.session is not None and self.session is not expired_session:
+                    await self.session.close()
+                self.session = None
+                raise
+            finally:
+                await self._retire(expired_session)
+
+    async def _retire(self, session):
+        """Close a replaced session now, or after the requests still using it."""
+        if session is None or session.closed:
+            return
+        if self._in_flight.get(session):
+            self._retired.append(session)
+        else:
+            await session.close()
 
     async def get_session_data_key(self):
         """Fetch sessionDataKey from login page."""
@@ -95,14 +151,20 @@ class EnelGridSession:
 
         _LOGGER.info("Session cookies enriched after SAMLResponse submission.")
 
-    async def fetch_consumption_data(self, validity_from=None, validity_to=None):
+    async def fetch_consumption_data(
+        self, validity_from=None, validity_to=None, debug_dump=False
+    ):
         """Fetch data after ensuring login.
 
         Args:
             validity_from: Optional start date in DDMMYYYY format
             validity_to: Optional end date in DDMMYYYY format
+            debug_dump: Also save the raw response into DEBUG_DIR
+
+        The authenticated session is kept open after the request so the same
+        instance can be reused for later fetches; call close() when done.
         """
-        await self.login()
+        fresh_login = await self.ensure_logged_in()
 
         if validity_from is None or validity_to is None:
             validity_from, validity_to = get_date_range()
@@ -113,27 +175,70 @@ class EnelGridSession:
             f"&_={int(datetime.now().timestamp() * 1000)}"
         )
 
-        _LOGGER.info(f"[EnelGrid API] Fetching: {validity_from} → {validity_to}")
-
-        async with self.session.get(url) as response:
-            response.raise_for_status()
-            json_data = await response.json()
-            await self.close()
-
-            # Save raw JSON for debugging
+        _LOGGER.info("[EnelGrid API] Fetching: %s → %s", validity_from, validity_to)
+
+        session = self.session
+        try:
+            raw = await self._get_raw(url)
+        except aiohttp.ClientResponseError as err:
+            # Other errors (5xx, 404, ...) say nothing about the session
+            if fresh_login or err.status not in AUTH_ERROR_STATUSES:
+                raise
+            raw = None
+        else:
+            # An expired session gets the HTML login page instead of JSON
+            if not fresh_login and _is_login_page(raw):
+                raw = None
+
+        if raw is None:
+            # Cookies of a reused session have expired: log in again and retry once
+            _LOGGER.info("[EnelGrid API] Session expired, logging in again")
+            await self._relogin(session)
+            raw = await self._get_raw(url)
+
+        json_data = orjson.loads(raw)
+
+        # Save raw JSON for debugging: the response bytes are written as-is
+        # (no re-serialization) from the executor, off the event loop
+        if debug_dump:
+            filename = f"enel_raw_{validity_from}_{validity_to}.json"
             try:
-                import os
-                import json as json_module
-                debug_dir = "/config/enelgrid_debug"
-                os.makedirs(debug_dir, exist_ok=True)
-                filename = f"enel_raw_{validity_from}_{validity_to}.json"
-                with open(os.path.join(debug_dir, filename), "w") as f:
-                    json_module.dump(json_data, f, indent=2)
-                _LOGGER.info(f"[EnelGrid Debug] Saved raw JSON to {filename}")
+                await asyncio.get_running_loop().run_in_executor(
+                    None, write_debug_file, filename, raw
+                )
+                _LOGGER.debug("[EnelGrid Debug] Saved raw JSON to %s", filename)
             except Exception as e:
-                _LOGGER.warning(f"[EnelGrid Debug] Failed to save JSON: {e}")
-
-            return json_data
+                _LOGGER.warning("[EnelGrid Debug] Failed to save JSON: %s", e)
+
+        return json_data
+
+    async def _get_raw(self, url):
+        """GET an authenticated URL and return the raw response body."""
+        session = self.session
+        self._in_flight[session] = self._in_flight.get(session, 0) + 1
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                return await response.read()
+        finally:
+            self._in_flight[session] -= 1
+            if not self._in_flight[session]:
+                del self._in_flight[session]
+                if session in self._retired:
+                    self._retired.remove(session)
+                    await session.close()
+
+
+def _is_login_page(raw):
+    """Whether a response body is an HTML page rather than the JSON payload."""
+    return raw.lstrip()[:1] == b"<"
+
+
+def write_debug_file(filename, payload):
+    """Write a debug dump into DEBUG_DIR (blocking, run it in an executor)."""
+    os.makedirs(DEBUG_DIR, exist_ok=True)
+    with open(os.path.join(DEBUG_DIR, filename), "wb") as f:
+        f.write(payload)
 
 
 def get_date_range():
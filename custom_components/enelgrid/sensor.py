@@ -1,6 +1,14 @@
+import asyncio
+import hashlib
 import logging
-from datetime import datetime, timedelta
-
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
+
+import numpy as np
+import orjson
 from homeassistant.components.persistent_notification import async_create
 from homeassistant.components.recorder import get_instance
 from homeassistant.components.recorder.statistics import (
@@ -9,29 +17,170 @@ from homeassistant.components.recorder.statistics import (
 )
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
-from homeassistant.helpers.event import async_track_time_interval
-from homeassistant.util.dt import as_utc
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.restore_state import RestoredExtraData, RestoreEntity
+from homeassistant.util.dt import as_local, as_utc, utc_from_timestamp
 from homeassistant.components.sensor import SensorDeviceClass
 
 from .const import (
+    CONF_ENABLE_DEBUG_DUMP,
+    CONF_MAX_LOOKBACK_MONTHS,
     CONF_PASSWORD,
     CONF_POD,
     CONF_PRICE_PER_KWH,
     CONF_USER_NUMBER,
     CONF_USERNAME,
+    DEFAULT_MAX_LOOKBACK_MONTHS,
     DOMAIN,
 )
-from .login import EnelGridSession
+from .login import EnelGridSession, write_debug_file
 
 _LOGGER = logging.getLogger(__name__)
-SCAN_INTERVAL = timedelta(days=1)  # Fetch once a day
+STATISTICS_CHUNK_SIZE = 5000  # Max rows per recorder import job
+CONSECUTIVE_EMPTY_THRESHOLD = 2  # Empty months in a row that end the history
+HISTORICAL_FETCH_CONCURRENCY = 4  # Parallel month requests to the Enel API
+REFRESH_DAYS = 3  # Last saved days rewritten on every update (Enel revises them)
+
+# Saved rows kept per statistic: enough to find the one before the refresh window
+_RECENT_STATS_SPAN = timedelta(days=REFRESH_DAYS + 1)
+_RECENT_STATS_ROWS = (REFRESH_DAYS + 1) * 25  # Hourly rows in that span, DST included
+
+_POD_TRANS = str.maketrans({"-": "_", ".": "_"})
+# Offsets of hour names H1..H25 (H25 only on the DST fall-back day) from midnight
+_HOUR_TD = tuple(timedelta(hours=i) for i in range(25))
+
+
+@lru_cache(maxsize=32)
+def _pod_object_id(pod: str) -> str:
+    """Return the object_id prefix shared by all entities/statistics of a POD."""
+    return f"enelgrid_{pod.translate(_POD_TRANS).lower()}"
+
+
+@lru_cache(maxsize=32)
+def _pod_statistics(pod: str) -> tuple[str, str, dict, dict]:
+    """Return (statistic_id_kw, statistic_id_cost, metadata_kw, metadata_cost) for a POD.
+
+    This is the single place where the statistic ids of a POD are derived.
+    The metadata dicts are shared between calls and must not be modified.
+    """
+    statistic_id_kw = f"sensor:{_pod_object_id(pod)}_consumption"
+    statistic_id_cost = f"sensor:{_pod_object_id(pod)}_kw_cost"
+
+    metadata_kw = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": f"Enel {pod} Consumption",
+        "source": "sensor",
+        "statistic_id": statistic_id_kw,
+        "unit_of_measurement": "kWh",
+    }
+
+    metadata_cost = {
+        "has_mean": False,
+        "has_sum": True,
+        "name": f"Enel {pod} Cost",
+        "source": "sensor",
+        "statistic_id": statistic_id_cost,
+        "unit_of_measurement": "EUR",
+    }
+
+    return statistic_id_kw, statistic_id_cost, metadata_kw, metadata_cost
+
+
+def _async_add_external_statistics_chunked(hass, metadata, statistics):
+    """Import statistics in bounded chunks instead of one unbounded job.
+
+    The recorder processes each import job in a single session, so splitting
+    large series (historical backfills) keeps its memory use per job bounded.
+    Imports are keyed on "start", so chunks can be written independently.
+    """
+    for index in range(0, len(statistics), STATISTICS_CHUNK_SIZE):
+        async_add_external_statistics(
+            hass, metadata, statistics[index : index + STATISTICS_CHUNK_SIZE]
+        )
+
+
+def _merge_recent_stats(recent_stats, stats):
+    """Return the (start, sum) rows to keep after writing `stats` over `recent_stats`.
+
+    Written rows replace the kept ones from their first start on. Only the last
+    _RECENT_STATS_SPAN is kept, plus the row before it, so that the row before
+    the refresh window is always there (see get_refresh_anchor).
+    """
+    cutoff = stats[-1]["start"] - _RECENT_STATS_SPAN
+    merged = recent_stats[
+        : bisect_left(recent_stats, stats[0]["start"], key=itemgetter(0))
+    ]
+    merged.extend(
+        (stat["start"], stat["sum"])
+        for stat in stats[
+            max(bisect_left(stats, cutoff, key=itemgetter("start")) - 1, 0) :
+        ]
+    )
+    return merged[max(bisect_left(merged, cutoff, key=itemgetter(0)) - 1, 0) :]
+
+
+def _debug_dump_enabled(entry):
+    """Whether to write the raw and parsed Enel payloads to DEBUG_DIR.
+
+    Opt-in through the enable_debug_dump option and only while debug logging is
+    on: every dump is a file write, which is wasted flash wear on SD-card installs.
+    """
+    return _LOGGER.isEnabledFor(logging.DEBUG) and entry.options.get(
+        CONF_ENABLE_DEBUG_DUMP, False
+    )
+
+
+def _daily_update_time(entry_id):
+    """Spread daily updates of different entries over the day.
+
+    The time is derived from a stable digest of the entry id (hash() is salted
+    per process), so an entry keeps its slot across restarts.
+    """
+    slot = int.from_bytes(
+        hashlib.blake2b(entry_id.encode(), digest_size=4).digest(), "big"
+    ) % (24 * 60)
+    return divmod(slot, 60)
+
+
+def _historical_month_ranges(today, count):
+    """Return (month, validity_from, validity_to) for `count` months, newest first.
+
+    The current month ends today instead of on its last day
+    (Enel API returns future data which is wrong).
+    """
+    ranges = []
+    month_end = today
+    for _ in range(count):
+        month_start = month_end.replace(day=1)
+        ranges.append(
+            (
+                month_start.strftime("%Y-%m"),
+                month_start.strftime("%d%m%Y"),
+                month_end.strftime("%d%m%Y"),
+            )
+        )
+        month_end = month_start - timedelta(days=1)
+    return ranges
 
 
 async def historical_fetch_task(hass, entry, sensor):
     """Background task to fetch all historical data month by month.
 
-    Starts from current month and goes backwards until API returns no data.
+    Goes backwards from the current month (at most DEFAULT_MAX_LOOKBACK_MONTHS,
+    or the max_lookback_months option), fetching months concurrently, and keeps
+    everything up to the first CONSECUTIVE_EMPTY_THRESHOLD months in a row the
+    API returns no data for.
+
+    The sensor's update lock is held throughout, so daily updates are skipped
+    until the backfill is done: one running in between would save against the
+    just-cleared statistics and seed the offset the backfill starts from.
     """
+    async with sensor._update_lock:
+        await _historical_fetch(hass, entry, sensor)
+
+
+async def _historical_fetch(hass, entry, sensor):
     _LOGGER.warning("[EnelGrid Historical] Starting full historical fetch...")
 
     pod = entry.data[CONF_POD]
@@ -44,29 +193,23 @@ async def historical_fetch_task(hass, entry, sensor):
     if entry.data.get("clear_statistics_needed", False):
         _LOGGER.warning("[EnelGrid Historical] Clearing old statistics as requested by migration...")
 
-        pod_normalized = pod.lower().replace('-', '_').replace('.', '_')
-        statistic_id_consumption = f"sensor:enelgrid_{pod_normalized}_consumption"
-        statistic_id_cost = f"sensor:enelgrid_{pod_normalized}_kw_cost"
+        statistic_id_consumption, statistic_id_cost, _, _ = _pod_statistics(pod)
 
         try:
             from homeassistant.components.recorder.statistics import clear_statistics
             recorder_instance = get_instance(hass)
 
-            # Clear consumption statistics
+            # Clear consumption and cost statistics in a single recorder job
             await recorder_instance.async_add_executor_job(
                 clear_statistics,
                 recorder_instance,
-                [statistic_id_consumption]
+                [statistic_id_consumption, statistic_id_cost]
             )
-            _LOGGER.warning(f"[EnelGrid Historical] Cleared consumption statistics: {statistic_id_consumption}")
+            _LOGGER.warning("[EnelGrid Historical] Cleared consumption statistics: %s", statistic_id_consumption)
+            _LOGGER.warning("[EnelGrid Historical] Cleared cost statistics: %s", statistic_id_cost)
 
-            # Clear cost statistics
-            await recorder_instance.async_add_executor_job(
-                clear_statistics,
-                recorder_instance,
-                [statistic_id_cost]
-            )
-            _LOGGER.warning(f"[EnelGrid Historical] Cleared cost statistics: {statistic_id_cost}")
+            # The sensor's cached recent statistics refer to the rows just dropped
+            sensor._recent_stats.clear()
 
             # Clear the flag
             new_data = dict(entry.data)
@@ -74,143 +217,205 @@ async def historical_fetch_task(hass, entry, sensor):
             hass.config_entries.async_update_entry(entry, data=new_data)
 
         except Exception as e:
-            _LOGGER.error(f"[EnelGrid Historical] Failed to clear statistics: {e}", exc_info=True)
+            _LOGGER.error("[EnelGrid Historical] Failed to clear statistics: %s", e, exc_info=True)
             # Continue anyway - better to have duplicate data than no data
 
-    current_date = datetime.now()
+    max_months = entry.options.get(CONF_MAX_LOOKBACK_MONTHS, DEFAULT_MAX_LOOKBACK_MONTHS)
+    months = _historical_month_ranges(datetime.now(), max_months)
     months_fetched = 0
     total_days = 0
 
-    # Collect all months data first (from newest to oldest)
-    all_months_data = []
+    # Months are independent, so fetch them concurrently (bounded, to be gentle
+    # with the Enel API). Fetches are started newest first; once a month fails or
+    # CONSECUTIVE_EMPTY_THRESHOLD months in a row come back empty, older months
+    # that haven't started yet are skipped.
+    semaphore = asyncio.Semaphore(HISTORICAL_FETCH_CONCURRENCY)
+    debug_dump = _debug_dump_enabled(entry)
+    history_end = len(months)
+    empty_months = set()
+
+    async def fetch_month(index, month, validity_from, validity_to):
+        nonlocal history_end
+        async with semaphore:
+            if index > history_end:
+                return None
 
-    while True:
-        try:
-            # Calculate month range
-            first_day = current_date.replace(day=1)
+            _LOGGER.warning(
+                "[EnelGrid Historical] Fetching month %s (%s → %s)...",
+                month,
+                validity_from,
+                validity_to,
+            )
 
-            # Last day of month
-            if current_date.month == 12:
-                last_day_of_month = current_date.replace(day=31)
-            else:
-                last_day_of_month = (current_date.replace(month=current_date.month + 1, day=1) - timedelta(days=1))
+            try:
+                data = await session.fetch_consumption_data(
+                    validity_from, validity_to, debug_dump=debug_dump
+                )
+                data_points, _ = parse_enel_hourly_data(data)
+            except Exception:
+                history_end = min(history_end, index)
+                raise
 
-            # For current month, use today instead of last day of month
-            # (Enel API returns future data which is wrong)
-            today = datetime.now()
-            if current_date.year == today.year and current_date.month == today.month:
-                last_day = today
-            else:
-                last_day = last_day_of_month
+            # Save parsed data_points for debugging (opt-in, see _debug_dump_enabled)
+            if debug_dump:
+                filename = f"parsed_{validity_from}_{validity_to}.json"
+                try:
+                    # Convert data_points to JSON-serializable format
+                    serializable = {}
+                    for date_key, points in data_points.items():
+                        serializable[str(date_key)] = [
+                            {
+                                "timestamp": timestamp.isoformat(),
+                                "kwh": kwh,
+                                "cumulative_kwh": cumulative_kwh
+                            }
+                            for timestamp, kwh, cumulative_kwh in zip(
+                                points["timestamps"],
+                                points["kwh"].tolist(),
+                                points["cumulative_kwh"].tolist(),
+                            )
+                        ]
+                    await hass.async_add_executor_job(
+                        write_debug_file, filename, orjson.dumps(serializable)
+                    )
+                    _LOGGER.debug("[EnelGrid Debug] Saved parsed data to %s", filename)
+                except Exception as e:
+                    _LOGGER.warning("[EnelGrid Debug] Failed to save parsed data: %s", e)
+
+            if not data_points:
+                # A single empty month can be a transient API hiccup; only a run of
+                # empty months marks the end of the available history
+                empty_months.add(index)
+                run_start = run_end = index
+                while run_start - 1 in empty_months:
+                    run_start -= 1
+                while run_end + 1 in empty_months:
+                    run_end += 1
+                if run_end - run_start + 1 >= CONSECUTIVE_EMPTY_THRESHOLD:
+                    history_end = min(history_end, run_start)
+
+            return data_points
+
+    # One authenticated session (a single login and a pooled connection) shared by
+    # every month fetch
+    session = EnelGridSession(username, password, pod, numero_utente)
+    try:
+        results = await asyncio.gather(
+            *(fetch_month(index, *month_range) for index, month_range in enumerate(months)),
+            return_exceptions=True,
+        )
+    finally:
+        await session.close()
 
-            validity_from = first_day.strftime("%d%m%Y")
-            validity_to = last_day.strftime("%d%m%Y")
+    # Collect all months data (from newest to oldest), stopping at the first run
+    # of months without data: that is where the available history ends.
+    # Months are prepended so the result is already oldest first for saving.
+    all_months_data = deque()
+    consecutive_empty = 0
 
-            _LOGGER.warning(
-                f"[EnelGrid Historical] Fetching month {current_date.strftime('%Y-%m')} "
-                f"({validity_from} → {validity_to})..."
+    for (month, _, _), data_points in zip(months, results):
+        if isinstance(data_points, Exception):
+            _LOGGER.error(
+                "[EnelGrid Historical] Error fetching month %s: %s",
+                month,
+                data_points,
+                exc_info=data_points,
             )
+            _LOGGER.warning("[EnelGrid Historical] Stopping fetch due to error")
+            break
 
-            # Fetch data for this month
-            session = EnelGridSession(username, password, pod, numero_utente)
-            data = await session.fetch_consumption_data(validity_from, validity_to)
-            data_points = parse_enel_hourly_data(data)
-
-            # Save parsed data_points for debugging
-            try:
-                import os
-                import json
-                debug_dir = "/config/enelgrid_debug"
-                os.makedirs(debug_dir, exist_ok=True)
-                filename = f"parsed_{validity_from}_{validity_to}.json"
-                # Convert data_points to JSON-serializable format
-                serializable = {}
-                for date_key, points in data_points.items():
-                    serializable[str(date_key)] = [
-                        {
-                            "timestamp": p["timestamp"].isoformat(),
-                            "kwh": p["kwh"],
-                            "cumulative_kwh": p["cumulative_kwh"]
-                        }
-                        for p in points
-                    ]
-                with open(os.path.join(debug_dir, filename), "w") as f:
-                    json.dump(serializable, f, indent=2)
-                _LOGGER.warning(f"[EnelGrid Debug] Saved parsed data to {filename}")
-            except Exception as e:
-                _LOGGER.warning(f"[EnelGrid Debug] Failed to save parsed data: {e}")
-
-            if not data_points or len(data_points) == 0:
+        if not data_points:
+            consecutive_empty += 1
+            if consecutive_empty >= CONSECUTIVE_EMPTY_THRESHOLD:
                 _LOGGER.warning(
-                    f"[EnelGrid Historical] No data returned for {current_date.strftime('%Y-%m')}, "
-                    "reached the limit of available historical data"
+                    "[EnelGrid Historical] No data returned for %s, "
+                    "reached the limit of available historical data",
+                    month,
                 )
                 break
-
-            # Store this month's data
-            all_months_data.append({
-                "month": current_date.strftime("%Y-%m"),
-                "data_points": data_points
-            })
-
-            months_fetched += 1
-            total_days += len(data_points)
-
             _LOGGER.warning(
-                f"[EnelGrid Historical] Month {current_date.strftime('%Y-%m')}: "
-                f"{len(data_points)} days fetched"
+                "[EnelGrid Historical] No data returned for %s, skipping", month
             )
+            continue
 
-            # Move to previous month
-            current_date = (current_date.replace(day=1) - timedelta(days=1))
+        consecutive_empty = 0
 
-        except Exception as e:
-            _LOGGER.error(
-                f"[EnelGrid Historical] Error fetching month {current_date.strftime('%Y-%m')}: {e}",
-                exc_info=True
-            )
-            _LOGGER.warning("[EnelGrid Historical] Stopping fetch due to error")
-            break
+        # Store this month's data
+        all_months_data.appendleft({
+            "month": month,
+            "data_points": data_points
+        })
+
+        months_fetched += 1
+        total_days += len(data_points)
+
+        _LOGGER.warning(
+            "[EnelGrid Historical] Month %s: %s days fetched",
+            month,
+            len(data_points),
+        )
 
     # Now save all data in chronological order (oldest first)
     _LOGGER.warning(
-        f"[EnelGrid Historical] Finished fetching. Got {months_fetched} months, "
-        f"{total_days} days total. Now saving in chronological order..."
+        "[EnelGrid Historical] Finished fetching. Got %s months, "
+        "%s days total. Now saving in chronological order...",
+        months_fetched,
+        total_days,
     )
 
-    all_months_data.reverse()  # Oldest first
-
     # Read offset ONCE at the beginning to avoid race conditions
     # (async_add_external_statistics doesn't immediately update DB)
-    object_id_kw = f"enelgrid_{pod.lower().replace('-', '_').replace('.', '_')}_consumption"
-    statistic_id_kw = f"sensor:{object_id_kw}"
-    cumulative_offset = await sensor.get_last_cumulative_kwh(statistic_id_kw)
-    _LOGGER.warning(f"[EnelGrid Historical] Starting with cumulative offset: {cumulative_offset:.2f} kWh")
+    statistic_id_kw = _pod_statistics(pod)[0]
+    _, cumulative_offset = await sensor.get_last_statistic(statistic_id_kw)
+    _LOGGER.warning("[EnelGrid Historical] Starting with cumulative offset: %.2f kWh", cumulative_offset)
+
+    # Build every month's statistics first and submit them all at once, instead
+    # of two recorder jobs per month
+    stats_kw = []
+    stats_cost = []
 
     for month_data in all_months_data:
         try:
             _LOGGER.warning(
-                f"[EnelGrid Historical] Saving month {month_data['month']} "
-                f"({len(month_data['data_points'])} days) with offset {cumulative_offset:.2f} kWh..."
+                "[EnelGrid Historical] Preparing month %s (%s days) with offset %.2f kWh...",
+                month_data["month"],
+                len(month_data["data_points"]),
+                cumulative_offset,
             )
-            # Pass offset and get updated offset after saving
-            cumulative_offset = await sensor.save_to_home_assistant(
-                month_data["data_points"],
-                pod,
-                entry.entry_id,
-                price_per_kwh,
-                cumulative_offset=cumulative_offset
+            # Pass offset and get updated offset after this month
+            cumulative_offset, month_stats_kw, month_stats_cost = (
+                await sensor.save_to_home_assistant(
+                    month_data["data_points"],
+                    pod,
+                    entry.entry_id,
+                    price_per_kwh,
+                    cumulative_offset=cumulative_offset,
+                    defer_write=True,
+                )
             )
+            stats_kw.extend(month_stats_kw)
+            stats_cost.extend(month_stats_cost)
             _LOGGER.warning(
-                f"[EnelGrid Historical] Month {month_data['month']} saved. "
-                f"New offset: {cumulative_offset:.2f} kWh"
+                "[EnelGrid Historical] Month %s prepared. New offset: %.2f kWh",
+                month_data["month"],
+                cumulative_offset,
             )
         except Exception as e:
             _LOGGER.error(
-                f"[EnelGrid Historical] Error saving month {month_data['month']}: {e}",
+                "[EnelGrid Historical] Error preparing month %s: %s",
+                month_data["month"],
+                e,
                 exc_info=True
             )
 
+    if stats_kw:
+        try:
+            sensor.write_statistics(pod, stats_kw, stats_cost)
+        except Exception as e:
+            _LOGGER.error(
+                "[EnelGrid Historical] Error saving statistics: %s", e, exc_info=True
+            )
+
     # Mark as completed
     new_data = dict(entry.data)
     new_data["historical_fetch_needed"] = False
@@ -218,8 +423,10 @@ async def historical_fetch_task(hass, entry, sensor):
     hass.config_entries.async_update_entry(entry, data=new_data)
 
     _LOGGER.warning(
-        f"[EnelGrid Historical] ✅ Historical fetch completed! "
-        f"Total: {months_fetched} months, {total_days} days"
+        "[EnelGrid Historical] ✅ Historical fetch completed! "
+        "Total: %s months, %s days",
+        months_fetched,
+        total_days,
     )
 
 
@@ -236,7 +443,9 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async_add_entities([consumption_sensor, monthly_sensor])  # cost_sensor
 
     _LOGGER.warning(
-        f"enelgrid sensors added: {consumption_sensor.entity_id}, {monthly_sensor.entity_id}"
+        "enelgrid sensors added: %s, %s",
+        consumption_sensor.entity_id,
+        monthly_sensor.entity_id,
     )
 
     # Check if we need full historical fetch (after migration)
@@ -253,14 +462,24 @@ async def async_setup_entry(hass, entry, async_add_entities):
     async def daily_update_callback(_):
         await consumption_sensor.async_update()
 
-    async_track_time_interval(hass, daily_update_callback, SCAN_INTERVAL)
+    hour, minute = _daily_update_time(entry_id)
+    entry.async_on_unload(
+        async_track_time_change(
+            hass, daily_update_callback, hour=hour, minute=minute, second=0
+        )
+    )
 
 
-class EnelGridConsumptionSensor(SensorEntity):
+class EnelGridConsumptionSensor(SensorEntity, RestoreEntity):
     """Main sensor to fetch and import data from enelgrid."""
 
+    # Updates are driven by the daily async_track_time_change timer set up in
+    # async_setup_entry; polling would hit the Enel API every 30 seconds
+    _attr_should_poll = False
+
     def __init__(self, hass, entry):
         self.hass = hass
+        self._entry = entry
         self.entry_id = entry.entry_id
         self._username = entry.data[CONF_USERNAME]
         self._password = entry.data[CONF_PASSWORD]
@@ -270,31 +489,120 @@ class EnelGridConsumptionSensor(SensorEntity):
         self._attr_name = "enelgrid Daily Import"
         self._state = None
         self.session = None
+        self._last_payload_hash = None  # Digest of the last imported payload
+        # statistic_id -> (start, sum) of the last saved rows, oldest first
+        # (see _merge_recent_stats)
+        self._recent_stats: dict[str, list[tuple[datetime, float]]] = {}
+        # Statistics are about to be cleared and re-fetched: a restored sum
+        # would be stale, so let the first save read it from the DB again
+        self._restore_cumulative = not entry.data.get("historical_fetch_needed", False)
+        self._update_lock = asyncio.Lock()
 
     @property
     def state(self):
         return self._state
 
+    @property
+    def extra_restore_state_data(self):
+        """Keep the recent saved statistics across restarts."""
+        statistic_id = _pod_statistics(self._pod)[0]
+        return RestoredExtraData(
+            {
+                "statistic_id": statistic_id,
+                "recent_stats": [
+                    [start.timestamp(), total]
+                    for start, total in self._recent_stats.get(statistic_id, [])
+                ],
+            }
+        )
+
+    async def async_added_to_hass(self):
+        """Restore the recent saved statistics, saving a recorder read."""
+        await super().async_added_to_hass()
+
+        statistic_id = _pod_statistics(self._pod)[0]
+        if not self._restore_cumulative or statistic_id in self._recent_stats:
+            return
+
+        last_extra_data = await self.async_get_last_extra_data()
+        if last_extra_data is None:
+            return
+
+        restored = last_extra_data.as_dict()
+        if restored.get("statistic_id") != statistic_id:
+            return
+
+        recent_stats = [
+            (utc_from_timestamp(start), float(total))
+            for start, total in restored.get("recent_stats") or []
+        ]
+        if recent_stats:
+            self._recent_stats[statistic_id] = recent_stats
+            _LOGGER.info("Restored cumulative offset: %.2f kWh", recent_stats[-1][1])
+
+    async def async_will_remove_from_hass(self):
+        """Close the Enel session kept open between updates."""
+        await self._async_close_session()
+
+    async def _async_close_session(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
     async def async_update(self):
+        # The initial update and the daily timer can overlap when an import is slow;
+        # never run two fetch/save cycles at once
+        if self._update_lock.locked():
+            _LOGGER.debug("enelgrid update already running, skipping")
+            return
+
+        async with self._update_lock:
+            await self._async_update()
+
+        # The sensor isn't polled, so publish the outcome of the update ourselves
+        if self.entity_id is not None:
+            self.async_write_ha_state()
+
+    async def _async_update(self):
         try:
-            self.session = EnelGridSession(
-                self._username, self._password, self._pod, self._numero_utente
+            # Reuse the authenticated session across updates; it logs in again
+            # by itself when its cookies have expired
+            if self.session is None:
+                self.session = EnelGridSession(
+                    self._username, self._password, self._pod, self._numero_utente
+                )
+
+            data = await self.session.fetch_consumption_data(
+                debug_dump=_debug_dump_enabled(self._entry)
             )
 
-            data = await self.session.fetch_consumption_data()
-            data_points = parse_enel_hourly_data(data)
+            # Same payload as the last successful import: nothing new to parse or save
+            payload_hash = hashlib.blake2b(orjson.dumps(data), digest_size=16).digest()
+            if payload_hash == self._last_payload_hash:
+                _LOGGER.info("Enel payload unchanged since last import, skipping.")
+                self._state = "Unchanged"
+                return
+
+            # Days before the refresh window are final and already saved
+            anchor_start, _ = await self.get_refresh_anchor(_pod_statistics(self._pod)[0])
+            data_points, total_kwh = parse_enel_hourly_data(
+                data, as_local(anchor_start).date() if anchor_start else None
+            )
 
             if data_points:
                 await self.save_to_home_assistant(
                     data_points, self._pod, self.entry_id, self._price_per_kwh
                 )
-                await self.update_monthly_sensor(data_points, self.entry_id)
+                await self.update_monthly_sensor(total_kwh, self.entry_id)
+                self._last_payload_hash = payload_hash
                 self._state = "Imported"
             else:
                 _LOGGER.warning("No hourly data found.")
                 self._state = "No data"
         except ConfigEntryAuthFailed as err:
             self._state = "Login error"
+            self._recent_stats.clear()
+            await self._async_close_session()
             async_create(
                 self.hass,
                 message=f"Login failed. Please check your credentials. {err}",
@@ -306,133 +614,228 @@ class EnelGridConsumptionSensor(SensorEntity):
             )
 
         except Exception as err:
-            _LOGGER.exception(f"Failed to update enelgrid data: {err}")
+            _LOGGER.exception("Failed to update enelgrid data: %s", err)
             self._state = "Error"
-        finally:
-            if self.session:
-                await self.session.close()
+            self._recent_stats.clear()
+            await self._async_close_session()
 
     async def save_to_home_assistant(
-        self, all_data_by_date, pod, entry_id, price_per_kwh, cumulative_offset=None
+        self,
+        all_data_by_date,
+        pod,
+        entry_id,
+        price_per_kwh,
+        cumulative_offset=None,
+        defer_write=False,
     ):
         """Save data to Home Assistant statistics.
 
         Args:
-            all_data_by_date: Dict of date -> list of data points
+            all_data_by_date: Dict of date -> parallel "timestamps", "kwh" and
+                              "cumulative_kwh" arrays (see parse_enel_hourly_data)
             pod: POD identifier
             entry_id: Config entry ID
             price_per_kwh: Price per kWh for cost calculation
-            cumulative_offset: Optional pre-calculated offset. If None, will read from DB.
+            cumulative_offset: Optional pre-calculated offset. If None, the hours
+                              after the refresh anchor (see get_refresh_anchor) are
+                              written again, continuing the anchor's sum, so revised
+                              provisional hours replace the saved ones.
                               This is used by historical_fetch_task to avoid race conditions.
+            defer_write: If True, don't write anything and also return the built
+                         statistics, so the caller can submit several batches at once
+                         with write_statistics.
 
         Returns:
-            The final cumulative value after saving (for updating offset in historical fetch)
+            The final cumulative value after saving (for updating offset in historical fetch),
+            or (final_cumulative, stats_kw, stats_cost) when defer_write is set
         """
 
-        object_id_kw = (
-            f"enelgrid_{pod.lower().replace('-', '_').replace('.', '_')}_consumption"
+        statistic_id_kw = _pod_statistics(pod)[0]
+
+        days = [day for day in all_data_by_date.values() if day["timestamps"]]
+
+        # Get cumulative offset: either provided (historical fetch) or the saved
+        # statistic just before the refresh window (daily update)
+        last_start = None
+        if cumulative_offset is None:
+            last_start, cumulative_offset = await self.get_refresh_anchor(
+                statistic_id_kw, days[0]["timestamps"][0] if days else None
+            )
+
+        saved_kwh = None  # Payload running total at the last hour kept as saved
+
+        if last_start is not None:
+            # The Enel window overlaps what was already imported. Days are sorted,
+            # so whole days up to the anchor are dropped by looking only at their
+            # last hour
+            first_day = next(
+                (i for i, day in enumerate(days) if day["timestamps"][-1] > last_start),
+                len(days),
+            )
+            if first_day:
+                saved_kwh = days[first_day - 1]["cumulative_kwh"][-1]
+            days = days[first_day:]
+
+        # Collect every day into one series per statistic so the recorder gets
+        # a single import job for each of them instead of one per day.
+        cumulative_kwh = (
+            np.concatenate([day["cumulative_kwh"] for day in days])
+            if days
+            else np.empty(0)
         )
-        statistic_id_kw = f"sensor:{object_id_kw}"
+        starts = [timestamp for day in days for timestamp in day["timestamps"]]
+
+        if last_start is not None and days:
+            # Only the first remaining day can still begin with hours up to the
+            # anchor; starts are sorted, so a binary search finds the first one after
+            first_new = bisect_right(starts, last_start)
+            if first_new:
+                saved_kwh = cumulative_kwh[first_new - 1]
+                cumulative_kwh = cumulative_kwh[first_new:]
+                starts = starts[first_new:]
+
+        # Continue the running total from the anchor
+        rebase = cumulative_offset
+        if saved_kwh is not None:
+            rebase -= float(saved_kwh)
+
+        # Rebasing onto the offset and pricing run as two vector ops over the
+        # whole batch; cost follows the final (offset) consumption value.
+        final_values = cumulative_kwh + rebase
+        cost_values = final_values * price_per_kwh
+        stats_kw = [
+            {"start": start, "sum": value}
+            for start, value in zip(starts, final_values.tolist())
+        ]
+        stats_cost = [
+            {"start": start, "sum": value}
+            for start, value in zip(starts, cost_values.tolist())
+        ]
+
+        final_cumulative = float(final_values[-1]) if len(final_values) else cumulative_offset
+
+        if defer_write:
+            return final_cumulative, stats_kw, stats_cost
+
+        if stats_kw:
+            self.write_statistics(pod, stats_kw, stats_cost)
+
+        return final_cumulative
 
-        object_id_cost = (
-            f"enelgrid_{pod.lower().replace('-', '_').replace('.', '_')}_kw_cost"
+    def write_statistics(self, pod, stats_kw, stats_cost):
+        """Submit consumption and cost statistics of a POD to the recorder."""
+        statistic_id_kw, statistic_id_cost, metadata_kw, metadata_cost = (
+            _pod_statistics(pod)
         )
-        statistic_id_cost = f"sensor:{object_id_cost}"
-
-        metadata_kw = {
-            "has_mean": False,
-            "has_sum": True,
-            "name": f"Enel {pod} Consumption",
-            "source": "sensor",
-            "statistic_id": statistic_id_kw,
-            "unit_of_measurement": "kWh",
-        }
 
-        metadata_cost = {
-            "has_mean": False,
-            "has_sum": True,
-            "name": f"Enel {pod} Cost",
-            "source": "sensor",
-            "statistic_id": statistic_id_cost,
-            "unit_of_measurement": "EUR",
-        }
+        try:
+            _async_add_external_statistics_chunked(self.hass, metadata_kw, stats_kw)
+            _async_add_external_statistics_chunked(self.hass, metadata_cost, stats_cost)
+            # The recorder imports asynchronously, so remember the last rows
+            # here rather than reading them back from the DB on the next update
+            self._recent_stats[statistic_id_kw] = _merge_recent_stats(
+                self._recent_stats.get(statistic_id_kw, []), stats_kw
+            )
+            _LOGGER.info(
+                "Saved %s points for %s and %s for %s",
+                len(stats_kw),
+                statistic_id_kw,
+                len(stats_cost),
+                statistic_id_cost,
+            )
+        except HomeAssistantError as e:
+            _LOGGER.exception(
+                "Failed to save statistics for %s: %s", statistic_id_kw, e
+            )
+            raise
 
-        # Get cumulative offset: either provided (historical fetch) or read from DB (daily update)
-        if cumulative_offset is None:
-            cumulative_offset = await self.get_last_cumulative_kwh(statistic_id_kw)
-            _LOGGER.info(f"Read cumulative offset from DB: {cumulative_offset:.2f} kWh")
-
-        final_cumulative = cumulative_offset  # Track final value for return
-
-        for day_date, data_points in all_data_by_date.items():
-            stats_kw = []
-            stats_cost = []
-
-            for point in data_points:
-                final_value = point["cumulative_kwh"] + cumulative_offset
-                stats_kw.append(
-                    {
-                        "start": as_utc(point["timestamp"]),
-                        "sum": final_value,
-                    }
-                )
-                stats_cost.append(
-                    {
-                        "start": as_utc(point["timestamp"]),
-                        "sum": final_value * price_per_kwh,  # Use final_value, not point["cumulative_kwh"]!
-                    }
-                )
-                final_cumulative = final_value  # Update with each point
+    async def get_last_statistic(self, statistic_id: str):
+        """Get the (start, cumulative kWh) of the last recorded row for a statistic_id.
 
-            try:
-                async_add_external_statistics(self.hass, metadata_kw, stats_kw)
-                async_add_external_statistics(
-                    self.hass, metadata_cost, stats_cost
-                )
-                _LOGGER.info(
-                    f"Saved {len(stats_kw)} points for {statistic_id_kw} and {len(stats_cost)} for {statistic_id_cost}"
-                )
-            except HomeAssistantError as e:
-                _LOGGER.exception(
-                    f"Failed to save statistics for {statistic_id_kw}: {e}"
-                )
-                raise
+        The start is None when nothing has been recorded yet.
+        """
+        recent_stats = await self._get_recent_stats(statistic_id)
+        return recent_stats[-1] if recent_stats else (None, 0.0)
+
+    async def get_refresh_anchor(self, statistic_id: str, first_start=None):
+        """Get the (start, cumulative kWh) of the row updates continue from.
+
+        Enel data lags and provisional hours get revised for a few days, so every
+        update rewrites the last REFRESH_DAYS saved days (from local midnight),
+        continuing the sum of the saved row just before them. first_start, the
+        first hour of the payload, moves the window later when the payload
+        doesn't reach back that far. The start is None when nothing has been
+        recorded yet.
+        """
+        recent_stats = await self._get_recent_stats(statistic_id)
+        if not recent_stats:
+            return None, 0.0
+
+        last_day = as_local(recent_stats[-1][0]).date()
+        refresh_from = as_utc(
+            datetime.combine(
+                last_day - timedelta(days=REFRESH_DAYS - 1), datetime.min.time()
+            )
+        )
+        if first_start is not None and first_start > refresh_from:
+            refresh_from = first_start
 
-        return final_cumulative
+        # Saved rows are sorted; the oldest one is kept when none is older
+        index = bisect_left(recent_stats, refresh_from, key=itemgetter(0))
+        return recent_stats[max(index - 1, 0)]
+
+    async def _get_recent_stats(self, statistic_id: str):
+        """Get the (start, sum) rows of the last saved days, oldest first.
+
+        This integration is the only writer of its statistics, so the rows are
+        read from the recorder once and then kept up to date by write_statistics.
+        """
+        if statistic_id in self._recent_stats:
+            return self._recent_stats[statistic_id]
 
-    async def get_last_cumulative_kwh(self, statistic_id: str):
-        """Get the last recorded cumulative kWh for a given statistic_id."""
         last_stats = await get_instance(self.hass).async_add_executor_job(
-            get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+            get_last_statistics,
+            self.hass,
+            _RECENT_STATS_ROWS,
+            statistic_id,
+            True,
+            {"sum"},
         )
 
-        if last_stats and statistic_id in last_stats:
+        # Rows come newest first
+        recent_stats = [
+            (utc_from_timestamp(row["start"]), row["sum"])
+            for row in reversed((last_stats or {}).get(statistic_id, []))
+        ]
+        if recent_stats:
             _LOGGER.info(
-                f"Last recorded cumulative sum for {statistic_id}: {last_stats[statistic_id][0]['sum']}"
+                "Last recorded cumulative sum for %s: %s",
+                statistic_id,
+                recent_stats[-1][1],
             )
-            return last_stats[statistic_id][0]["sum"]  # Last recorded cumulative sum
-        return 0.0
 
-    async def update_monthly_sensor(self, all_data_by_date, entry_id):
+        self._recent_stats[statistic_id] = recent_stats
+        return recent_stats
+
+    async def update_monthly_sensor(self, total_kwh, entry_id):
         monthly_sensor = self.hass.data.get("enelgrid_monthly_sensor", {}).get(entry_id)
 
         if not monthly_sensor:
-            _LOGGER.error(f"Monthly sensor is not available for entry {entry_id}!")
+            _LOGGER.error("Monthly sensor is not available for entry %s!", entry_id)
             return
 
-        total_kwh = sum(
-            points[-1]["cumulative_kwh"] for points in all_data_by_date.values()
-        )
-
         monthly_sensor.set_total(total_kwh)
-        _LOGGER.info(f"Updated monthly sensor to {total_kwh} kWh")
+        _LOGGER.info("Updated monthly sensor to %s kWh", total_kwh)
 
 
 class EnelGridMonthlySensor(SensorEntity):
     """Monthly cumulative total sensor."""
 
+    # Only the consumption sensor's updates feed it, through set_total
+    _attr_should_poll = False
+
     def __init__(self, pod):
-        object_id = f"enelgrid_{pod.lower().replace('-', '_').replace('.', '_')}_monthly_consumption"
+        object_id = f"{_pod_object_id(pod)}_monthly_consumption"
         self.entity_id = f"sensor.{object_id}"
         self._attr_name = f"Enel {pod} Monthly Consumption"
         self._attr_device_class = SensorDeviceClass.ENERGY
@@ -446,12 +849,30 @@ class EnelGridMonthlySensor(SensorEntity):
         return self._state
 
     def set_total(self, new_total):
+        # Unchanged totals (e.g. a retried update) don't need a new state event
+        if new_total == self._state:
+            return
+
         self._state = new_total
         self.async_write_ha_state()
 
 
-def parse_enel_hourly_data(data):
-    """Extract all hourly data into per-day structure, preserving cross-day cumulative values."""
+def parse_enel_hourly_data(data, last_saved_date=None):
+    """Extract all hourly data into per-day structure, preserving cross-day cumulative values.
+
+    Each day maps to parallel arrays (struct of arrays) instead of a list of
+    per-hour dicts: "timestamps" (list of UTC datetimes, ready to be used as
+    statistics starts), "kwh" and "cumulative_kwh" (float64 numpy arrays). All
+    hours are laid out in one flat series and the running total is computed with
+    a single np.cumsum; the per-day arrays are views into it.
+
+    Days before last_saved_date are left out of the result (they still count in
+    the running total, so cumulative values don't depend on it); this skips the
+    timestamp work for hours that were already imported.
+
+    Returns (all_data_by_date, total_kwh), total_kwh being the running total at
+    the end of the payload.
+    """
     aggregations = (
         data.get("data", {}).get("aggregationResult", {}).get("aggregations", [])
     )
@@ -465,38 +886,47 @@ def parse_enel_hourly_data(data):
         raise ValueError("No hourly consumption data found in JSON")
 
     all_data_by_date = {}
-    cumulative_offset = 0
 
-    sorted_results = sorted(
-        hourly_aggregation.get("results", []),
-        key=lambda r: datetime.strptime(r["date"], "%d%m%Y"),
+    # Parse each DDMMYYYY date once by slicing (much cheaper than strptime) and
+    # sort on the parsed value, reusing it in the loop below
+    dated_results = sorted(
+        (
+            (date(int(r["date"][4:8]), int(r["date"][2:4]), int(r["date"][0:2])), r)
+            for r in hourly_aggregation.get("results", [])
+        ),
+        key=itemgetter(0),
     )
 
-    for day_result in sorted_results:
-        date_str = day_result.get("date")
-        day_date = datetime.strptime(date_str, "%d%m%Y").date()
-
-        hourly_points = []
-        running_total = cumulative_offset
-
-        for hour_entry in day_result.get("binValues", []):
-            hour_number = int(hour_entry["name"][1:])
-            hour_time = datetime.combine(day_date, datetime.min.time()) + timedelta(
-                hours=hour_number - 1
-            )
-
-            running_total += hour_entry["value"]
-            hourly_points.append(
-                {
-                    "timestamp": hour_time,
-                    "kwh": hour_entry["value"],
-                    "cumulative_kwh": running_total,
-                }
-            )
-
-        all_data_by_date[day_date] = hourly_points
+    day_bins = [day_result.get("binValues", []) for _, day_result in dated_results]
+    kwh = np.fromiter(
+        (hour_entry["value"] for bin_values in day_bins for hour_entry in bin_values),
+        dtype=np.float64,
+        count=sum(map(len, day_bins)),
+    )
+    cumulative_kwh = np.cumsum(kwh)
+
+    day_begin = 0
+    for (day_date, _), bin_values in zip(dated_results, day_bins):
+        day_end = day_begin + len(bin_values)
+        if last_saved_date is not None and day_date < last_saved_date:
+            day_begin = day_end
+            continue
+
+        day_start = datetime.combine(day_date, datetime.min.time())
+        # Hours are local to HA's time zone; convert them once here rather than
+        # on every save
+        timestamps = [
+            as_utc(day_start + _HOUR_TD[int(hour_entry["name"][1:]) - 1])
+            for hour_entry in bin_values
+        ]
+
+        all_data_by_date[day_date] = {
+            "timestamps": timestamps,
+            "kwh": kwh[day_begin:day_end],
+            "cumulative_kwh": cumulative_kwh[day_begin:day_end],
+        }
+        day_begin = day_end
 
-        if hourly_points:
-            cumulative_offset = hourly_points[-1]["cumulative_kwh"]
+    total_kwh = float(cumulative_kwh[-1]) if len(cumulative_kwh) else 0.0
 
-    return all_data_by_date
+    return all_data_by_date, total_kwh
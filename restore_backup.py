@@ -18,23 +18,32 @@ Requirements:
 import argparse
 import json
 import sys
-from datetime import datetime
+from datetime import datetime, timezone
+from functools import partial
 
 try:
+    import orjson  # Ships with Home Assistant; much faster on large backups
+except ImportError:
+    orjson = None
+
+try:
+    from homeassistant.components.recorder import get_instance
     from homeassistant.components.recorder.statistics import async_add_external_statistics, get_metadata
     from homeassistant.core import HomeAssistant
-    from homeassistant.util.dt import as_utc
     HAS_HA = True
 except ImportError:
     HAS_HA = False
     print("Warning: Home Assistant libraries not found. Will only validate backup file.")
 
+# Rows per async_add_external_statistics call, to cap the size of each recorder job
+RESTORE_CHUNK_SIZE = 1000
+
 
 def validate_backup(backup_path):
     """Validate backup file structure."""
     try:
-        with open(backup_path, 'r') as f:
-            backup = json.load(f)
+        with open(backup_path, 'rb') as f:
+            backup = orjson.loads(f.read()) if orjson else json.load(f)
 
         required_keys = ['version', 'backup_timestamp', 'statistic_id_consumption', 'pod', 'original_statistics']
         missing = [k for k in required_keys if k not in backup]
@@ -62,7 +71,17 @@ def validate_backup(backup_path):
         return None
 
 
-def restore_backup_to_ha(hass: HomeAssistant, backup_data: dict):
+def _add_statistics_chunked(hass, metadata, statistics):
+    """Import statistics in RESTORE_CHUNK_SIZE batches instead of one huge job."""
+    for start in range(0, len(statistics), RESTORE_CHUNK_SIZE):
+        async_add_external_statistics(
+            hass,
+            metadata,
+            statistics[start:start + RESTORE_CHUNK_SIZE]
+        )
+
+
+async def restore_backup_to_ha(hass: HomeAssistant, backup_data: dict):
     """Restore backup data to Home Assistant (requires running HA instance)."""
     if not HAS_HA:
         print("❌ Cannot restore: Home Assistant libraries not available")
@@ -74,41 +93,41 @@ def restore_backup_to_ha(hass: HomeAssistant, backup_data: dict):
     print(f"📊 Restoring {len(backup_data['original_statistics'])} records...")
 
     # Convert backup data to HA statistics format
-    restored_stats = []
-    for stat in backup_data['original_statistics']:
-        restored_stats.append({
-            "start": as_utc(datetime.fromtimestamp(stat["start"])),
+    # (fromtimestamp with tz=UTC already returns an aware UTC datetime, no as_utc needed)
+    restored_stats = [
+        {
+            "start": datetime.fromtimestamp(stat["start"], tz=timezone.utc),
             "sum": stat["sum"]
-        })
+        }
+        for stat in backup_data['original_statistics']
+    ]
 
     # Get metadata
     metadata_ids = {statistic_id_kw}
     if statistic_id_cost:
         metadata_ids.add(statistic_id_cost)
 
-    metadata = get_metadata(hass, statistic_ids=metadata_ids)
+    # get_metadata queries the database: run it in the recorder executor, once for both ids
+    metadata = await get_instance(hass).async_add_executor_job(
+        partial(get_metadata, hass, statistic_ids=metadata_ids)
+    )
 
     if statistic_id_kw not in metadata:
         print(f"❌ Statistic ID not found in database: {statistic_id_kw}")
         return False
 
+    meta_kw = metadata[statistic_id_kw][1]
+    meta_cost = metadata.get(statistic_id_cost, (None, None))[1]
+
     # Restore consumption statistics
     print(f"   Writing consumption statistics...")
-    async_add_external_statistics(
-        hass,
-        metadata[statistic_id_kw][1],
-        restored_stats
-    )
+    _add_statistics_chunked(hass, meta_kw, restored_stats)
 
     # Restore cost statistics if available
-    if statistic_id_cost and statistic_id_cost in metadata:
+    if meta_cost:
         print(f"   Writing cost statistics...")
         # Cost uses same cumulative values
-        async_add_external_statistics(
-            hass,
-            metadata[statistic_id_cost][1],
-            restored_stats
-        )
+        _add_statistics_chunked(hass, meta_cost, restored_stats)
 
     print("✅ Restore completed successfully!")
     print("\n⚠️  IMPORTANT: You must now downgrade enelgrid to v1.0.0 to prevent re-migration")
@@ -1,13 +1,17 @@
 from unittest.mock import patch, AsyncMock, MagicMock
 
 import pytest
+import voluptuous as vol
 from homeassistant import data_entry_flow
 from homeassistant.config_entries import SOURCE_USER, SOURCE_REAUTH, ConfigEntry
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 from custom_components.enelgrid.const import (
+    CONF_ENABLE_DEBUG_DUMP,
+    CONF_MAX_LOOKBACK_MONTHS,
     CONF_POD,
     CONF_USER_NUMBER,
     CONF_PRICE_PER_KWH,
@@ -26,6 +30,7 @@ It ensures the integration correctly handles:
 - Sensor creation with proper unique IDs
 - Entity setup and value updates from backend responses
 - Proper unloading and reloading of the configuration entry
+- The options flow storing the integration options
 
 Each test uses mocks to isolate Home Assistant logic from external dependencies like HTTP sessions, and validates correct flow types and state transitions.
 """
@@ -40,9 +45,9 @@ USER_INPUT = {
 
 
 @pytest.fixture(autouse=True)
-def disable_track_time_interval():
+def disable_track_time_change():
     """Disable actual timers in tests."""
-    with patch("homeassistant.helpers.event.async_track_time_interval") as mock:
+    with patch("homeassistant.helpers.event.async_track_time_change") as mock:
         yield mock
 
 
@@ -309,3 +314,36 @@ async def test_unload_and_reload_config_entry(hass: HomeAssistant):
 
         assert await hass.config_entries.async_setup(entry.entry_id)
         mock_setup.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_options_flow(hass: HomeAssistant):
+    """Test that the options flow is offered and stores the chosen options."""
+    entry = MockConfigEntry(domain=DOMAIN, data=USER_INPUT.copy(), version=4)
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result2 = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={CONF_ENABLE_DEBUG_DUMP: True, CONF_MAX_LOOKBACK_MONTHS: 12},
+    )
+
+    assert result2["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert entry.options == {CONF_ENABLE_DEBUG_DUMP: True, CONF_MAX_LOOKBACK_MONTHS: 12}
+
+
+@pytest.mark.asyncio
+async def test_options_flow_rejects_invalid_lookback(hass: HomeAssistant):
+    """Test that a lookback of less than one month is refused."""
+    entry = MockConfigEntry(domain=DOMAIN, data=USER_INPUT.copy(), version=4)
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+
+    with pytest.raises(vol.Invalid):
+        await hass.config_entries.options.async_configure(
+            result["flow_id"], user_input={CONF_MAX_LOOKBACK_MONTHS: 0}
+        )
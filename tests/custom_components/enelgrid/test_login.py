@@ -0,0 +1,201 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import aiohttp
+import pytest
+
+from custom_components.enelgrid.login import EnelGridSession
+
+"""
+Test suite for the EnelGrid session handling.
+
+These tests replace the SAML login and the aiohttp session with fakes and check:
+
+- A session logs in once and is then reused
+- A failure in one of several concurrent fetches doesn't break the others
+- A reused session logs in again (once) on 401/403 or an HTML login page
+- Other HTTP errors are raised as-is, without a new login
+- A failure right after a fresh login is not retried
+- The raw response is only dumped when asked to
+"""
+
+PAYLOAD = b'{"data": {}}'
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=PAYLOAD, delay=0):
+        self.status = status
+        self.body = body
+        self.delay = delay
+        self.session = None
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(MagicMock(), (), status=self.status)
+
+    async def read(self):
+        if self.session.closed:
+            raise aiohttp.ClientConnectionError("Connection closed")
+        return self.body
+
+
+class FakeClientSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.closed = False
+
+    def get(self, url):
+        response = self.responses.pop(0)
+        response.session = self
+        return response
+
+    async def close(self):
+        self.closed = True
+
+
+def _enel_session(*client_sessions):
+    """An EnelGridSession whose logins hand out the given fake sessions in order."""
+    enel_session = EnelGridSession("user", "password", "IT1234567890", 12345678)
+    enel_session.logins = 0
+    pending = list(client_sessions)
+
+    async def fake_login():
+        await asyncio.sleep(0)
+        enel_session.logins += 1
+        enel_session.session = pending.pop(0)
+
+    enel_session.login = fake_login
+    return enel_session
+
+
+@pytest.mark.asyncio
+async def test_ensure_logged_in_once():
+    """Only the first call logs in; later ones reuse the open session."""
+    enel_session = _enel_session(FakeClientSession())
+
+    assert await enel_session.ensure_logged_in() is True
+    assert await enel_session.ensure_logged_in() is False
+    assert enel_session.logins == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "expired_response",
+    [FakeResponse(status=401), FakeResponse(status=403), FakeResponse(body=b"<html>")],
+)
+async def test_expired_session_logs_in_again(expired_response):
+    """A reused session rejected by Enel is replaced and the request retried."""
+    first = FakeClientSession(FakeResponse(), expired_response)
+    second = FakeClientSession(FakeResponse())
+    enel_session = _enel_session(first, second)
+
+    await enel_session.fetch_consumption_data("01012025", "31012025")
+    data = await enel_session.fetch_consumption_data("01022025", "28022025")
+
+    assert data == {"data": {}}
+    assert enel_session.logins == 2
+    assert enel_session.session is second
+    assert first.closed
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_survive_a_relogin():
+    """Requests in flight on an expired session finish before it is closed."""
+    first = FakeClientSession(
+        FakeResponse(),
+        FakeResponse(status=401, delay=0.01),
+        FakeResponse(delay=0.05),
+        FakeResponse(delay=0.05),
+        FakeResponse(delay=0.05),
+    )
+    second = FakeClientSession(FakeResponse())
+    enel_session = _enel_session(first, second)
+    await enel_session.fetch_consumption_data("01012025", "31012025")
+
+    results = await asyncio.gather(
+        *(
+            enel_session.fetch_consumption_data(f"01{month:02}2024", f"28{month:02}2024")
+            for month in range(1, 5)
+        ),
+        return_exceptions=True,
+    )
+
+    assert results == [{"data": {}}] * 4
+    assert enel_session.logins == 2
+    assert enel_session.session is second
+    assert first.closed
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetch_error_stays_local():
+    """A 5xx on one concurrent fetch neither logs in again nor fails the others."""
+    enel_session = _enel_session(
+        FakeClientSession(
+            FakeResponse(),
+            FakeResponse(delay=0.05),
+            FakeResponse(status=503, delay=0.01),
+            FakeResponse(delay=0.05),
+            FakeResponse(delay=0.05),
+        )
+    )
+    await enel_session.fetch_consumption_data("01012025", "31012025")
+
+    results = await asyncio.gather(
+        *(
+            enel_session.fetch_consumption_data(f"01{month:02}2024", f"28{month:02}2024")
+            for month in range(1, 5)
+        ),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[1], aiohttp.ClientResponseError)
+    assert [results[0], results[2], results[3]] == [{"data": {}}] * 3
+    assert enel_session.logins == 1
+    assert not enel_session.session.closed
+
+
+@pytest.mark.asyncio
+async def test_server_error_does_not_log_in_again():
+    """A 5xx on a reused session is raised without a new login."""
+    enel_session = _enel_session(
+        FakeClientSession(FakeResponse(), FakeResponse(status=503))
+    )
+
+    await enel_session.fetch_consumption_data("01012025", "31012025")
+    with pytest.raises(aiohttp.ClientResponseError):
+        await enel_session.fetch_consumption_data("01022025", "28022025")
+
+    assert enel_session.logins == 1
+
+
+@pytest.mark.asyncio
+async def test_auth_error_after_fresh_login_is_raised():
+    """A session that was just logged in is not logged in again for a retry."""
+    enel_session = _enel_session(FakeClientSession(FakeResponse(status=401)))
+
+    with pytest.raises(aiohttp.ClientResponseError):
+        await enel_session.fetch_consumption_data("01012025", "31012025")
+
+    assert enel_session.logins == 1
+
+
+@pytest.mark.asyncio
+async def test_debug_dump_is_opt_in():
+    """The raw response is only written when debug_dump is set."""
+    enel_session = _enel_session(FakeClientSession(FakeResponse(), FakeResponse()))
+
+    with patch("custom_components.enelgrid.login.write_debug_file") as write:
+        await enel_session.fetch_consumption_data("01012025", "31012025")
+        write.assert_not_called()
+
+        await enel_session.fetch_consumption_data(
+            "01022025", "28022025", debug_dump=True
+        )
+        write.assert_called_once_with("enel_raw_01022025_28022025.json", PAYLOAD)
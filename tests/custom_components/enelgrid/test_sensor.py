@@ -0,0 +1,429 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant, State
+from homeassistant.util.dt import as_utc
+from pytest_homeassistant_custom_component.common import (
+    mock_restore_cache_with_extra_data,
+)
+
+from custom_components.enelgrid.const import (
+    CONF_MAX_LOOKBACK_MONTHS,
+    CONF_PASSWORD,
+    CONF_POD,
+    CONF_PRICE_PER_KWH,
+    CONF_USER_NUMBER,
+    CONF_USERNAME,
+)
+
+"""
+Test suite for the EnelGrid hourly payload parser.
+
+These tests feed a minimal aggregateConsumption payload to parse_enel_hourly_data and check:
+
+- Days are returned in chronological order regardless of the API order
+- Hour names (H1..H24) map to the right local hours, converted to UTC
+- Cumulative values keep running across day boundaries
+- Parsed days are turned into offset consumption and cost statistics
+- Neither sensor is polled
+- Hours already saved are skipped and the running total continues after them
+- The last REFRESH_DAYS saved days are rewritten, so revised hours replace them
+- The recent saved statistics survive a restart through restored state
+- The historical fetch stops at the first failed month or run of empty months,
+  skips isolated empty months and saves the months oldest first
+"""
+
+ENTRY_DATA = {
+    CONF_USERNAME: "test@example.com",
+    CONF_PASSWORD: "password123",
+    CONF_POD: "IT1234567890",
+    CONF_USER_NUMBER: 12345678,
+    CONF_PRICE_PER_KWH: 0.5,
+}
+STATISTIC_ID = "sensor:enelgrid_it1234567890_consumption"
+
+
+@pytest.fixture
+def mock_entry():
+    """A config entry stand-in carrying ENTRY_DATA."""
+    entry = MagicMock()
+    entry.entry_id = "dummy_entry"
+    entry.data = dict(ENTRY_DATA)
+    entry.options = {}
+    return entry
+
+
+def _parse(data):
+    # Imported lazily: importing sensor.py at collection time would bind the real
+    # async_track_time_change before the config flow tests get to patch it.
+    from custom_components.enelgrid.sensor import parse_enel_hourly_data
+
+    all_data_by_date, _ = parse_enel_hourly_data(data)
+    return all_data_by_date
+
+
+def _payload(results):
+    return {
+        "data": {
+            "aggregationResult": {
+                "aggregations": [
+                    {"referenceID": "hourlyConsumption", "results": results}
+                ]
+            }
+        }
+    }
+
+
+def _day(date_str, values):
+    return {
+        "date": date_str,
+        "binValues": [
+            {"name": f"H{hour}", "value": value}
+            for hour, value in enumerate(values, start=1)
+        ],
+    }
+
+
+def test_parse_cumulative_across_days():
+    """Cumulative kWh continues from the previous day and days are sorted."""
+    data = _payload([_day("02012025", [0.5, 1.5]), _day("01012025", [1.0, 2.0])])
+
+    result = _parse(data)
+
+    assert list(result) == [date(2025, 1, 1), date(2025, 1, 2)]
+
+    first_day = result[date(2025, 1, 1)]
+    assert first_day["timestamps"] == [
+        as_utc(datetime(2025, 1, 1, 0, 0)),
+        as_utc(datetime(2025, 1, 1, 1, 0)),
+    ]
+    assert first_day["kwh"].tolist() == [1.0, 2.0]
+    assert first_day["cumulative_kwh"].tolist() == [1.0, 3.0]
+
+    second_day = result[date(2025, 1, 2)]
+    assert second_day["cumulative_kwh"].tolist() == [3.5, 5.0]
+
+
+def test_parse_skips_days_before_last_saved_date():
+    """Days before last_saved_date are dropped without shifting cumulative values."""
+    from custom_components.enelgrid.sensor import parse_enel_hourly_data
+
+    data = _payload([_day("01012025", [1.0, 2.0]), _day("02012025", [0.5, 1.5])])
+
+    result, total_kwh = parse_enel_hourly_data(data, date(2025, 1, 2))
+
+    assert list(result) == [date(2025, 1, 2)]
+    assert total_kwh == 5.0
+    assert result[date(2025, 1, 2)]["cumulative_kwh"].tolist() == [3.5, 5.0]
+
+
+def test_parse_without_hourly_aggregation():
+    """A payload without hourlyConsumption is rejected."""
+    with pytest.raises(ValueError):
+        _parse({"data": {"aggregationResult": {"aggregations": []}}})
+
+
+def test_historical_month_ranges():
+    """Month ranges go backwards from today; the current month ends today."""
+    from custom_components.enelgrid.sensor import _historical_month_ranges
+
+    assert _historical_month_ranges(datetime(2025, 3, 15), 3) == [
+        ("2025-03", "01032025", "15032025"),
+        ("2025-02", "01022025", "28022025"),
+        ("2025-01", "01012025", "31012025"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_save_deferred_statistics(hass: HomeAssistant, mock_entry):
+    """Deferred save returns offset consumption and cost series without writing."""
+    from custom_components.enelgrid.sensor import EnelGridConsumptionSensor
+
+    sensor = EnelGridConsumptionSensor(hass, mock_entry)
+    data_points = _parse(
+        _payload([_day("01012025", [1.0, 2.0]), _day("02012025", [4.0])])
+    )
+
+    final, stats_kw, stats_cost = await sensor.save_to_home_assistant(
+        data_points,
+        "IT1234567890",
+        "dummy_entry",
+        0.5,
+        cumulative_offset=10.0,
+        defer_write=True,
+    )
+
+    assert final == 17.0
+    assert [stat["sum"] for stat in stats_kw] == [11.0, 13.0, 17.0]
+    assert [stat["sum"] for stat in stats_cost] == [5.5, 6.5, 8.5]
+    assert stats_kw[0]["start"] == as_utc(datetime(2025, 1, 1, 0, 0))
+    assert [stat["start"] for stat in stats_cost] == [
+        stat["start"] for stat in stats_kw
+    ]
+
+
+def test_sensors_not_polled(hass: HomeAssistant, mock_entry):
+    """The sensors only update from the daily timer, never from HA polling."""
+    from custom_components.enelgrid import sensor
+
+    assert not hasattr(sensor, "SCAN_INTERVAL")
+    assert sensor.EnelGridConsumptionSensor(hass, mock_entry).should_poll is False
+    assert sensor.EnelGridMonthlySensor("IT1234567890").should_poll is False
+
+
+@pytest.mark.asyncio
+async def test_monthly_sensor_total(hass: HomeAssistant, mock_entry):
+    """The monthly total is the running kWh at the end of the payload."""
+    from custom_components.enelgrid.sensor import (
+        EnelGridConsumptionSensor,
+        parse_enel_hourly_data,
+    )
+
+    sensor = EnelGridConsumptionSensor(hass, mock_entry)
+    monthly_sensor = MagicMock()
+    hass.data["enelgrid_monthly_sensor"] = {"dummy_entry": monthly_sensor}
+    _, total_kwh = parse_enel_hourly_data(
+        _payload([_day("01012025", [1.0, 2.0]), _day("02012025", [4.0])])
+    )
+
+    await sensor.update_monthly_sensor(total_kwh, "dummy_entry")
+
+    monthly_sensor.set_total.assert_called_once_with(7.0)
+
+
+@pytest.mark.asyncio
+async def test_restore_last_cumulative(hass: HomeAssistant, mock_entry):
+    """The cumulative offset comes from the restored extra data, not the recorder."""
+    from custom_components.enelgrid.sensor import EnelGridConsumptionSensor
+
+    sensor = EnelGridConsumptionSensor(hass, mock_entry)
+    sensor.entity_id = "sensor.enelgrid_daily_import"
+    mock_restore_cache_with_extra_data(
+        hass,
+        [
+            (
+                State(sensor.entity_id, "Imported"),
+                {
+                    "statistic_id": STATISTIC_ID,
+                    "recent_stats": [
+                        [as_utc(datetime(2024, 12, 31, 23, 0)).timestamp(), 42.0]
+                    ],
+                },
+            )
+        ],
+    )
+
+    await sensor.async_added_to_hass()
+    final = await sensor.save_to_home_assistant(
+        _parse(_payload([_day("01012025", [1.0])])),
+        "IT1234567890",
+        "dummy_entry",
+        0.5,
+        defer_write=True,
+    )
+
+    assert final[0] == 43.0
+    # The cache isn't exposed as state attributes, so imports don't change them
+    assert sensor.extra_state_attributes is None
+
+
+@pytest.mark.asyncio
+async def test_save_skips_already_saved_hours(hass: HomeAssistant, mock_entry):
+    """Only hours after the last saved statistic are added, continuing its sum."""
+    from custom_components.enelgrid.sensor import EnelGridConsumptionSensor
+
+    sensor = EnelGridConsumptionSensor(hass, mock_entry)
+    sensor._recent_stats[STATISTIC_ID] = [(as_utc(datetime(2025, 1, 1, 1, 0)), 100.0)]
+    data_points = _parse(
+        _payload([_day("01012025", [1.0, 2.0]), _day("02012025", [4.0])])
+    )
+
+    final, stats_kw, stats_cost = await sensor.save_to_home_assistant(
+        data_points,
+        "IT1234567890",
+        "dummy_entry",
+        0.5,
+        defer_write=True,
+    )
+
+    assert final == 104.0
+    assert [stat["start"] for stat in stats_kw] == [as_utc(datetime(2025, 1, 2, 0, 0))]
+    assert [stat["sum"] for stat in stats_kw] == [104.0]
+    assert [stat["sum"] for stat in stats_cost] == [52.0]
+
+
+@pytest.mark.asyncio
+async def test_save_nothing_new(hass: HomeAssistant, mock_entry):
+    """A payload already fully saved yields no statistics and keeps the last sum."""
+    from custom_components.enelgrid.sensor import EnelGridConsumptionSensor
+
+    sensor = EnelGridConsumptionSensor(hass, mock_entry)
+    sensor._recent_stats[STATISTIC_ID] = [(as_utc(datetime(2025, 1, 2, 0, 0)), 100.0)]
+    data_points = _parse(
+        _payload([_day("01012025", [1.0, 2.0]), _day("02012025", [4.0])])
+    )
+
+    final, stats_kw, stats_cost = await sensor.save_to_home_assistant(
+        data_points,
+        "IT1234567890",
+        "dummy_entry",
+        0.5,
+        defer_write=True,
+    )
+
+    assert final == 100.0
+    assert stats_kw == []
+    assert stats_cost == []
+
+
+@pytest.mark.asyncio
+async def test_save_rewrites_refresh_window(hass: HomeAssistant, mock_entry):
+    """The last REFRESH_DAYS saved days are rewritten from the row before them."""
+    from custom_components.enelgrid.sensor import EnelGridConsumptionSensor
+
+    sensor = EnelGridConsumptionSensor(hass, mock_entry)
+    sensor._recent_stats[STATISTIC_ID] = [
+        (as_utc(datetime(2025, 1, day, 0, 0)), total)
+        for day, total in ((1, 101.0), (2, 103.0), (3, 104.0), (4, 105.0))
+    ]
+    # January 3 was saved as a provisional 1 kWh and has since been revised to 5
+    data_points = _parse(
+        _payload(
+            [
+                _day("01012025", [1.0]),
+                _day("02012025", [2.0]),
+                _day("03012025", [5.0]),
+                _day("04012025", [1.0]),
+                _day("05012025", [3.0]),
+            ]
+        )
+    )
+
+    with patch(
+        "custom_components.enelgrid.sensor._async_add_external_statistics_chunked"
+    ) as add_statistics:
+        final = await sensor.save_to_home_assistant(
+            data_points, "IT1234567890", "dummy_entry", 0.5
+        )
+
+    stats_kw = add_statistics.call_args_list[0].args[2]
+    assert final == 112.0
+    assert [stat["start"] for stat in stats_kw] == [
+        as_utc(datetime(2025, 1, day, 0, 0)) for day in (2, 3, 4, 5)
+    ]
+    assert [stat["sum"] for stat in stats_kw] == [103.0, 108.0, 109.0, 112.0]
+    assert [stat["sum"] for stat in add_statistics.call_args_list[1].args[2]] == [
+        51.5,
+        54.0,
+        54.5,
+        56.0,
+    ]
+    # The next update continues from the row before the new window
+    assert await sensor.get_last_statistic(STATISTIC_ID) == (
+        as_utc(datetime(2025, 1, 5, 0, 0)),
+        112.0,
+    )
+    assert await sensor.get_refresh_anchor(STATISTIC_ID) == (
+        as_utc(datetime(2025, 1, 2, 0, 0)),
+        103.0,
+    )
+
+
+async def _historical_fetch(hass, entry, responses):
+    """Run historical_fetch_task against one response per month, newest first.
+
+    A response is the list of hourly values of the month's first day (empty for a
+    month without data) or an exception to raise. Months with data answer a bit
+    later than the others, like real requests in flight.
+    Returns (validity_from of every month fetched, statistics written).
+    """
+    from custom_components.enelgrid.sensor import (
+        EnelGridConsumptionSensor,
+        _historical_month_ranges,
+        historical_fetch_task,
+    )
+
+    entry.options = {CONF_MAX_LOOKBACK_MONTHS: len(responses)}
+    months = _historical_month_ranges(datetime.now(), len(responses))
+    response_by_month = {
+        validity_from: response
+        for (_, validity_from, _), response in zip(months, responses)
+    }
+    fetched = []
+
+    async def fetch_consumption_data(validity_from, validity_to, debug_dump=False):
+        fetched.append(validity_from)
+        response = response_by_month[validity_from]
+        if isinstance(response, Exception):
+            raise response
+        if not response:
+            return _payload([])
+        await asyncio.sleep(0.01)
+        return _payload([_day(validity_from, response)])
+
+    session = MagicMock()
+    session.fetch_consumption_data = AsyncMock(side_effect=fetch_consumption_data)
+    session.close = AsyncMock()
+
+    sensor = EnelGridConsumptionSensor(hass, entry)
+    sensor._recent_stats[STATISTIC_ID] = []
+    sensor.write_statistics = MagicMock()
+
+    with patch(
+        "custom_components.enelgrid.sensor.EnelGridSession", return_value=session
+    ), patch.object(hass.config_entries, "async_update_entry"):
+        await historical_fetch_task(hass, entry, sensor)
+
+    session.close.assert_awaited_once()
+    written = sensor.write_statistics.call_args
+    return fetched, written.args[1] if written else []
+
+
+def _month_start(months_ago):
+    month_start = datetime.now().replace(day=1)
+    for _ in range(months_ago):
+        month_start = (month_start - timedelta(days=1)).replace(day=1)
+    return as_utc(datetime.combine(month_start.date(), datetime.min.time()))
+
+
+@pytest.mark.asyncio
+async def test_historical_fetch_stops_at_failed_month(hass: HomeAssistant, mock_entry):
+    """A month that fails ends the history: it and older months aren't saved."""
+    _, stats_kw = await _historical_fetch(
+        hass, mock_entry, [[1.0], [2.0], RuntimeError("Enel API down"), [4.0]]
+    )
+
+    assert [stat["start"] for stat in stats_kw] == [_month_start(1), _month_start(0)]
+    assert [stat["sum"] for stat in stats_kw] == [2.0, 3.0]
+
+
+@pytest.mark.asyncio
+async def test_historical_fetch_skips_isolated_empty_month(
+    hass: HomeAssistant, mock_entry
+):
+    """A single empty month is skipped and the months are saved oldest first."""
+    _, stats_kw = await _historical_fetch(
+        hass, mock_entry, [[1.0], [], [3.0], [4.0]]
+    )
+
+    assert [stat["start"] for stat in stats_kw] == [
+        _month_start(3),
+        _month_start(2),
+        _month_start(0),
+    ]
+    assert [stat["sum"] for stat in stats_kw] == [4.0, 7.0, 8.0]
+
+
+@pytest.mark.asyncio
+async def test_historical_fetch_ends_at_empty_months(hass: HomeAssistant, mock_entry):
+    """Two empty months in a row end the history; older months aren't started."""
+    responses = [[1.0], [], [], [4.0], [5.0], [6.0]]
+    fetched, stats_kw = await _historical_fetch(hass, mock_entry, responses)
+
+    assert fetched == [
+        _month_start(months_ago).strftime("%d%m%Y") for months_ago in range(3)
+    ]
+    assert [stat["start"] for stat in stats_kw] == [_month_start(0)]
+    assert [stat["sum"] for stat in stats_kw] == [1.0]